@@ -4,70 +4,106 @@ import datetime
 
 DB_NAME = 'bilibili_monitor.db'
 
+SEEN_COMMENTS_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS {name} (
+    rpid TEXT PRIMARY KEY,
+    type INTEGER NOT NULL DEFAULT 1,
+    oid TEXT NOT NULL,
+    seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (type, oid) REFERENCES targets (type, oid) ON DELETE CASCADE
+)
+'''
+
+def _migrate_legacy_videos(cursor):
+    """將舊版 videos 表格中的影片遷移為 type=1 的監控目標，並重建已見評論表格以引用 targets。"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'videos'")
+    if cursor.fetchone():
+        cursor.execute('''
+        INSERT OR IGNORE INTO targets (type, oid, source_id, title, added_at)
+        SELECT 1, oid, bv_id, title, added_at FROM videos
+        ''')
+        cursor.execute('DROP TABLE videos')
+
+    # 舊版 seen_comments 的外鍵指向已刪除的 videos 表格，需要重建
+    cursor.execute('PRAGMA foreign_key_list(seen_comments)')
+    if {row[2] for row in cursor.fetchall()} != {'targets'}:
+        cursor.execute('PRAGMA table_info(seen_comments)')
+        type_column = 'type' if 'type' in {row[1] for row in cursor.fetchall()} else '1'
+        cursor.execute('DROP TABLE IF EXISTS seen_comments_new')
+        cursor.execute(SEEN_COMMENTS_SCHEMA.format(name='seen_comments_new'))
+        cursor.execute(f'''
+        INSERT OR IGNORE INTO seen_comments_new (rpid, type, oid, seen_at)
+        SELECT rpid, {type_column}, oid, seen_at FROM seen_comments
+        ''')
+        cursor.execute('DROP TABLE seen_comments')
+        cursor.execute('ALTER TABLE seen_comments_new RENAME TO seen_comments')
+
 def init_db():
     """初始化數據庫，創建所需的表格（如果它們不存在的話）。"""
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
-        # 創建影片表格
+        # 創建監控目標表格：每個目標由評論區類型 (type) 和 oid 唯一確定
+        # source_id 是面向用戶的標識，例如 BV 號、cv 號或動態 ID
         cursor.execute('''
-        CREATE TABLE IF NOT EXISTS videos (
-            oid TEXT PRIMARY KEY,
-            bv_id TEXT NOT NULL UNIQUE,
-            title TEXT NOT NULL,
-            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        # 創建已見評論表格
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS seen_comments (
-            rpid TEXT PRIMARY KEY,
+        CREATE TABLE IF NOT EXISTS targets (
+            type INTEGER NOT NULL,
             oid TEXT NOT NULL,
-            seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (oid) REFERENCES videos (oid) ON DELETE CASCADE
+            source_id TEXT NOT NULL UNIQUE,
+            title TEXT NOT NULL,
+            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (type, oid)
         )
         ''')
-        # 為 oid 創建索引以加速查詢
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_oid ON seen_comments (oid)')
+        # 創建已見評論表格（所有類型的目標共用）
+        cursor.execute(SEEN_COMMENTS_SCHEMA.format(name='seen_comments'))
+        _migrate_legacy_videos(cursor)
+        # 為 (type, oid) 創建索引以加速查詢
+        cursor.execute('DROP INDEX IF EXISTS idx_oid')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_source ON seen_comments (type, oid)')
         conn.commit()
 
-def get_monitored_videos():
-    """從數據庫獲取所有正在監控的影片列表。"""
+def get_monitored_targets():
+    """從數據庫獲取所有正在監控的目標列表，每項為 (type, oid, source_id, title)。"""
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
-        cursor.execute('SELECT oid, bv_id, title FROM videos ORDER BY added_at DESC')
+        cursor.execute('SELECT type, oid, source_id, title FROM targets ORDER BY added_at DESC')
         return cursor.fetchall()
 
-def add_video_to_db(oid, bv_id, title):
-    """將一個新影片添加到數據庫。"""
+def add_target_to_db(source_type, oid, source_id, title):
+    """將一個新的監控目標添加到數據庫。"""
     try:
         with sqlite3.connect(DB_NAME) as conn:
             cursor = conn.cursor()
-            cursor.execute('INSERT INTO videos (oid, bv_id, title) VALUES (?, ?, ?)', (oid, bv_id, title))
+            cursor.execute('INSERT INTO targets (type, oid, source_id, title) VALUES (?, ?, ?, ?)',
+                           (source_type, oid, source_id, title))
             conn.commit()
             return True
     except sqlite3.IntegrityError:
-        print(f"提示：影片 {bv_id} ({title}) 已經在數據庫中。")
+        print(f"提示：目標 {source_id} ({title}) 已經在數據庫中。")
         return False
 
-def remove_video_from_db(oid):
-    """從數據庫中移除一個影片及其所有相關的已見評論。"""
+def remove_target_from_db(source_type, oid):
+    """從數據庫中移除一個監控目標及其所有相關的已見評論。"""
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM videos WHERE oid = ?', (oid,))
+        cursor.execute('DELETE FROM seen_comments WHERE type = ? AND oid = ?', (source_type, oid))
+        cursor.execute('DELETE FROM targets WHERE type = ? AND oid = ?', (source_type, oid))
         conn.commit()
         return cursor.rowcount > 0
 
-def load_seen_comments_for_video(oid):
-    """為給定的影片加載所有已見評論的 rpid 到一個集合中。"""
+def load_seen_comments_for_target(source_type, oid):
+    """為給定的目標加載所有已見評論的 rpid 到一個集合中。"""
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
-        cursor.execute('SELECT rpid FROM seen_comments WHERE oid = ?', (oid,))
+        cursor.execute('SELECT rpid FROM seen_comments WHERE type = ? AND oid = ?', (source_type, oid))
         return {row[0] for row in cursor.fetchall()}
 
-def add_comment_to_db(rpid, oid):
-    """將一個新的已見評論 rpid 添加到數據庫。"""
+def add_comments_to_db(rpids, source_type, oid):
+    """將一批新的已見評論 rpid 在同一個事務中添加到數據庫。"""
+    if not rpids:
+        return
     with sqlite3.connect(DB_NAME) as conn:
         cursor = conn.cursor()
-        cursor.execute('INSERT OR IGNORE INTO seen_comments (rpid, oid) VALUES (?, ?)', (rpid, oid))
+        cursor.executemany('INSERT OR IGNORE INTO seen_comments (rpid, type, oid) VALUES (?, ?, ?)',
+                           [(rpid, source_type, oid) for rpid in rpids])
         conn.commit()
-
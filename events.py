@@ -0,0 +1,214 @@
+# filename: events.py
+import atexit
+import datetime
+import json
+import os
+import queue
+import sys
+import threading
+
+# 结构化事件日志文件（JSON Lines，每行一个事件）
+EVENT_LOG_FILE = 'bili_events.jsonl'
+# 单个日志文件的最大字节数，超过后轮转为 .1, .2 ...
+MAX_LOG_BYTES = 10 * 1024 * 1024
+# 保留的历史日志文件数量
+BACKUP_COUNT = 3
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+# 控制台与日志文件各自的最低输出级别，可通过环境变量覆盖
+CONSOLE_LEVEL = os.environ.get('BILI_CONSOLE_LEVEL', 'info').lower()
+FILE_LEVEL = os.environ.get('BILI_LOG_LEVEL', 'debug').lower()
+
+# 后台线程每次最多合并写出的事件数
+_BATCH_SIZE = 500
+
+_queue = queue.Queue()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+# --- 控制台渲染 ---
+# 每种事件对应一个函数，把事件字典渲染为控制台文本；返回 None 表示不在控制台显示。
+
+# error 事件按 stage 选择控制台文案，error 字段为原始错误信息
+ERROR_MESSAGES = {
+    'fetch_comments': "抓取 type={type} oid={oid} 的顶层评论时出错: {error}",
+    'fetch_replies': "获取 type={type} oid={oid} 中评论 {root} 的子评论时出错: {error}",
+    'check_target': "检查【{title}】时发生错误 ({error_type}): {error}，已跳过该目标",
+    'webhook_config': "{file} 第 {line} 行无效，已跳过: {error}",
+}
+
+
+def _render_error(e):
+    if e.get('stage') == 'monitor_loop':
+        return (f"\n[严重错误] 监控循环中发生未知错误 ({e['error_type']}): {e['error']}\n"
+                f"等待 {e['retry_in']} 秒后重试...")
+    prefix = {'warning': '[警告]', 'error': '[错误]'}.get(e['level'], '[提示]')
+    template = ERROR_MESSAGES.get(e.get('stage'), "[{stage}] {error}")
+    return f"  - {prefix} {template.format(**e)}"
+
+
+def _render_wait(e):
+    minutes, seconds = divmod(e['interval'], 60)
+    wait_message = f"等待 {minutes} 分钟 {seconds} 秒后" if minutes > 0 else f"等待 {seconds} 秒后"
+    return f"{wait_message}进行下一轮检查...\n您可以随时按下 [Enter] 键来立即开始下一轮检查。"
+
+
+RENDERERS = {
+    'target_loaded': lambda e: f"正在为【{e['title']}】加载历史评论记录...\n"
+                               f"-> 加载完成，已记录 {e['seen']} 则历史评论。",
+    'monitor_start': lambda e: "\n" + "=" * 20 + " 初始化监控数据 " + "=" * 20,
+    'monitor_ready': lambda e: f"\n✅ 准备就绪！开始监控 {e['targets']} 个目标。\n" + "=" * 55,
+    'cycle_start': lambda e: f"\n[{e['ts'][:19].replace('T', ' ')}] 开始新一轮检查...",
+    'target_check': lambda e: f"  -> 正在检查【{e['title']}】...",
+    'fetch_replies': lambda e: f"  └── 发现【{e['user']}】的评论有 {e['rcount']} 条回复，正在抓取所有回复...",
+    'fetch_result': lambda e: f"     [{e['stage']}] 获取到 {e['count']} 条评论",
+    'new_comments': lambda e: "*" * 25 + f"\n🔥【{e['title']}】发现 {e['count']} 则新评论！\n" + "*" * 25,
+    'new_comment': lambda e: (f"  类型: {e['comment_type']}\n"
+                              f"  用户: {e['user']}\n"
+                              f"  评论: {e['message']}\n"
+                              f"  时间: {e['time'][:19].replace('T', ' ')}\n" + "-" * 25),
+    'notify_queued': lambda e: f"  - [通知] 已将 {e['comments']} 条评论排队发送到 {e['destination']}。",
+    'notify_result': lambda e: (f"  - [通知] Webhook 通知已成功发送到 {e['destination']}。" if e['ok']
+                                else f"  - [错误] 发送 Webhook 通知到 {e['destination']} 失败: {e['error']}"),
+    'cycle_end': lambda e: f"\n所有目标检查完毕（本轮发现 {e['new_comments']} 条新评论，耗时 {e['duration']} 秒）。",
+    'wait': _render_wait,
+    'manual_trigger': lambda e: "\n收到手动触发指令，立即开始新一轮检查！",
+    'error': _render_error,
+    'shutdown': lambda e: "\n程序被用户手动中断 (Ctrl+C)。正在等待剩余通知发送完毕...",
+    'shutdown_complete': lambda e: "再见！",
+}
+
+
+def render(event):
+    """把一个事件渲染为控制台文本。"""
+    renderer = RENDERERS.get(event['event'])
+    if renderer is None:
+        fields = {k: v for k, v in event.items() if k not in ('ts', 'event', 'level')}
+        return f"  [{event['event']}] {fields}"
+    return renderer(event)
+
+
+# --- 后台写入 ---
+
+class _EventWriter(threading.Thread):
+    """后台线程：成批地把事件写入 JSON Lines 文件（按大小轮转）并渲染到控制台。"""
+
+    def __init__(self):
+        super().__init__(name='event-writer', daemon=True)
+        self.file = None
+        self.size = 0
+
+    def _open(self):
+        self.file = open(EVENT_LOG_FILE, 'a', encoding='utf-8', buffering=64 * 1024)
+        self.size = self.file.tell()
+
+    def _rotate(self):
+        self.file.close()
+        # 轮转失败时（例如 Windows 上日志文件被其他进程占用），下次写入会重新打开文件
+        self.file = None
+        for i in range(BACKUP_COUNT - 1, 0, -1):
+            src = f"{EVENT_LOG_FILE}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{EVENT_LOG_FILE}.{i + 1}")
+        if BACKUP_COUNT > 0:
+            os.replace(EVENT_LOG_FILE, f"{EVENT_LOG_FILE}.1")
+        else:
+            os.remove(EVENT_LOG_FILE)
+        self._open()
+
+    def _write_batch(self, batch):
+        file_threshold = LEVELS.get(FILE_LEVEL, LEVELS['debug'])
+        console_threshold = LEVELS.get(CONSOLE_LEVEL, LEVELS['info'])
+
+        # 文件写入失败不影响控制台输出
+        try:
+            lines = [json.dumps(e, ensure_ascii=False, default=str) + "\n"
+                     for e in batch if LEVELS[e['level']] >= file_threshold]
+            if lines:
+                if self.file is None:
+                    self._open()
+                for line in lines:
+                    self.file.write(line)
+                    self.size += len(line.encode('utf-8'))
+                    if self.size >= MAX_LOG_BYTES:
+                        self._rotate()
+                self.file.flush()
+        except Exception as e:
+            sys.stderr.write(f"[events] 写入事件日志失败: {e}\n")
+
+        console = []
+        for e in batch:
+            if LEVELS[e['level']] >= console_threshold:
+                try:
+                    text = render(e)
+                except (KeyError, TypeError, ValueError):
+                    text = f"  [{e['event']}] {e}"
+                if text is not None:
+                    console.append(text + "\n")
+        if console:
+            sys.stdout.write("".join(console))
+            sys.stdout.flush()
+
+    def run(self):
+        running = True
+        while running:
+            batch = [_queue.get()]
+            while len(batch) < _BATCH_SIZE:
+                try:
+                    batch.append(_queue.get_nowait())
+                except queue.Empty:
+                    break
+            events = [e for e in batch if e is not None]
+            running = len(events) == len(batch)
+            try:
+                self._write_batch(events)
+            except Exception as e:
+                # 任何异常都不能让后台线程退出，否则之后的事件将无人处理
+                sys.stderr.write(f"[events] 处理事件失败: {e}\n")
+            finally:
+                for _ in batch:
+                    _queue.task_done()
+        if self.file is not None:
+            self.file.close()
+
+
+def _ensure_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = _EventWriter()
+            _writer.start()
+
+
+def emit(event, level='info', **fields):
+    """记录一个事件。只做入队，实际的文件写入和控制台输出由后台线程完成。"""
+    if level not in LEVELS:
+        raise ValueError(f"未知的日志级别 '{level}'，可选值: {', '.join(LEVELS)}")
+    record = {
+        "ts": datetime.datetime.now().astimezone().isoformat(timespec='milliseconds'),
+        "event": event,
+        "level": level,
+    }
+    record.update(fields)
+    _ensure_writer()
+    _queue.put(record)
+
+
+def flush():
+    """阻塞直到所有已记录的事件都被写出（例如在等待用户输入之前调用）。"""
+    if _writer is not None and _writer.is_alive():
+        _queue.join()
+
+
+def close():
+    """写出剩余事件并停止后台线程。"""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None and writer.is_alive():
+        _queue.put(None)
+        writer.join(timeout=5)
+
+
+atexit.register(close)
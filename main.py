@@ -6,7 +6,6 @@ import json
 import hashlib
 import urllib.parse
 import time
-import datetime
 import pandas as pd
 import subprocess
 import platform  # 导入 platform 模块来判断操作系统
@@ -19,11 +18,42 @@ else:
 
 # 导入我们自己的模块
 import database as db
+import events
 import notifier  # <-- 新增：导入通知模块
 
+# B站评论区类型 (type) 与其名称，fetch 层统一按 (type, oid) 抓取评论
+SOURCE_TYPES = {
+    1: "视频",
+    11: "图文动态",
+    12: "专栏",
+    14: "音频",
+    17: "动态",
+}
+
+# 两次 B站 API 请求之间的最小间隔（秒），所有监控目标共用（例如子评论翻页）
+REQUEST_INTERVAL = 1.0
+# 检查完一个目标后的休息时间（秒），防止请求过快触发风控
+TARGET_INTERVAL = 3
+
+# 所有监控目标共用一个连接池
+SESSION = requests.Session()
+_last_request_at = 0.0
+
 
 # --- 核心功能函数 ---
 
+def api_get(url, header, **kwargs):
+    """通过共享的 Session 发送 GET 请求，并保证全局请求频率不超过 REQUEST_INTERVAL。"""
+    global _last_request_at
+    delay = _last_request_at + REQUEST_INTERVAL - time.time()
+    if delay > 0:
+        time.sleep(delay)
+    try:
+        return SESSION.get(url, headers=header, timeout=5, **kwargs)
+    finally:
+        _last_request_at = time.time()
+
+
 def get_header():
     """从 'bili_cookie.txt' 读取 cookie 并构建请求头。"""
     try:
@@ -67,7 +97,7 @@ def get_information(bv, header):
     print(f"正在获取视频 {bv} 的信息...")
     api_url = f"https://api.bilibili.com/x/web-interface/view?bvid={bv}"
     try:
-        resp = requests.get(api_url, headers=header, timeout=5)
+        resp = api_get(api_url, header)
         resp.raise_for_status()
         data = resp.json()
         if data.get('code') == 0:
@@ -83,6 +113,89 @@ def get_information(bv, header):
     return None, None
 
 
+def get_dynamic_information(dynamic_id, header):
+    """通过API获取动态对应的评论区 (type, oid) 以及用于显示的标题。"""
+    print(f"正在获取动态 {dynamic_id} 的信息...")
+    api_url = f"https://api.bilibili.com/x/polymer/web-dynamic/v1/detail?id={dynamic_id}"
+    try:
+        resp = api_get(api_url, header)
+        resp.raise_for_status()
+        data = resp.json()
+        if data.get('code') == 0:
+            item = data.get('data', {}).get('item', {})
+            basic = item.get('basic', {})
+            source_type = basic.get('comment_type')
+            oid = basic.get('comment_id_str')
+            if source_type and oid:
+                modules = item.get('modules', {})
+                author = modules.get('module_author', {}).get('name', '')
+                desc = (modules.get('module_dynamic', {}).get('desc') or {}).get('text', '').strip()
+                title = f"{author}的动态: {desc[:20]}" if desc else f"{author}的动态 {dynamic_id}"
+                print(f"  - [API] 成功获取: 【{title}】")
+                return int(source_type), str(oid), title
+    except Exception as e:
+        print(f"  - [警告] API请求失败: {e}。")
+    print(f"  - [错误] 无法通过 API 获取动态 {dynamic_id} 的信息，请检查动态 ID 是否正确或 Cookie 是否有效。")
+    return None, None, None
+
+
+def get_title_information(api_url, header):
+    """通过返回 data.title 的API（专栏、音频）获取标题。"""
+    try:
+        resp = api_get(api_url, header)
+        resp.raise_for_status()
+        data = resp.json()
+        if data.get('code') == 0:
+            title = (data.get('data') or {}).get('title')
+            if title:
+                print(f"  - [API] 成功获取: 【{title.strip()}】")
+                return title.strip()
+    except Exception as e:
+        print(f"  - [警告] API请求失败: {e}。")
+    return None
+
+
+def resolve_source(text, header):
+    """
+    将用户输入解析为监控目标，返回 (type, oid, source_id, title)，失败时返回 None。
+    支持 BV 号、动态链接或 dyn<动态ID>、cv 号、au 号，以及直接指定的 type:oid。
+    """
+    match = re.search(r'BV[0-9A-Za-z]{10}', text)
+    if match:
+        bv = match.group(0)
+        oid, title = get_information(bv, header)
+        return (1, oid, bv, title) if oid and title else None
+
+    match = re.search(r'(?:t\.bilibili\.com/|/opus/|^dyn)(\d+)', text)
+    if match:
+        source_type, oid, title = get_dynamic_information(match.group(1), header)
+        return (source_type, oid, f"dyn{match.group(1)}", title) if oid else None
+
+    match = re.search(r'\bcv(\d+)', text)
+    if match:
+        cvid = match.group(1)
+        print(f"正在获取专栏 cv{cvid} 的信息...")
+        title = get_title_information(f"https://api.bilibili.com/x/article/viewinfo?id={cvid}", header)
+        return (12, cvid, f"cv{cvid}", title) if title else None
+
+    match = re.search(r'\bau(\d+)', text)
+    if match:
+        sid = match.group(1)
+        print(f"正在获取音频 au{sid} 的信息...")
+        title = get_title_information(
+            f"https://www.bilibili.com/audio/music-service-c/web/song/info?sid={sid}", header)
+        return (14, sid, f"au{sid}", title) if title else None
+
+    match = re.fullmatch(r'(\d+):(\d+)', text)
+    if match:
+        source_type, oid = int(match.group(1)), match.group(2)
+        type_name = SOURCE_TYPES.get(source_type, f"type={source_type}")
+        return source_type, oid, f"{source_type}:{oid}", f"{type_name} {oid}"
+
+    print(f"  - [错误] 无法识别的输入 '{text}'。")
+    return None
+
+
 def md5(code):
     """对输入字符串执行 MD5 哈希。"""
     MD5 = hashlib.md5()
@@ -90,33 +203,39 @@ def md5(code):
     return MD5.hexdigest()
 
 
-def fetch_latest_comments(oid, header):
-    """抓取给定视频 oid 的第一页最新评论 (顶层评论)。"""
+def fetch_latest_comments(source_type, oid, header):
+    """抓取给定评论区 (type, oid) 的第一页最新评论 (顶层评论)。"""
     if not oid: return []
     mixin_key_salt = "ea1db124af3c7062474693fa704f4ff8"
-    params = {'oid': oid, 'type': 1, 'mode': 2, 'plat': 1, 'web_location': 1315875, 'wts': int(time.time())}
+    params = {'oid': oid, 'type': source_type, 'mode': 2, 'plat': 1, 'web_location': 1315875, 'wts': int(time.time())}
     query_for_w_rid = urllib.parse.urlencode(sorted(params.items()))
     w_rid = md5(query_for_w_rid + mixin_key_salt)
     params['w_rid'] = w_rid
     url = f"https://api.bilibili.com/x/v2/reply/wbi/main?{urllib.parse.urlencode(params)}"
     try:
-        response = requests.get(url, headers=header, timeout=5)
+        response = api_get(url, header)
         response.raise_for_status()
         comment_data = response.json()
-        return comment_data.get('data', {}).get('replies', []) or []
+        if comment_data.get('code') != 0:
+            # 例如评论区已关闭或内容已删除 (code=12002)，此时 data 为 null
+            events.emit('error', level='warning', stage='fetch_comments', type=source_type, oid=oid,
+                        code=comment_data.get('code'), error=comment_data.get('message', '未知错误'))
+            return []
+        return (comment_data.get('data') or {}).get('replies', []) or []
     except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-        print(f"抓取 oid={oid} 的顶层评论时出错：{e}")
+        events.emit('error', level='error', stage='fetch_comments', type=source_type, oid=oid,
+                    error_type=type(e).__name__, error=str(e))
     return []
 
 
-def fetch_all_sub_replies(oid, root_rpid, header):
+def fetch_all_sub_replies(source_type, oid, root_rpid, header):
     """获取指定根评论 (root_rpid) 下的所有分页回复（子评论）。"""
     all_replies = []
     page_number = 1
     while True:
-        url = f"https://api.bilibili.com/x/v2/reply/reply?oid={oid}&type=1&root={root_rpid}&pn={page_number}&ps=20"
+        url = f"https://api.bilibili.com/x/v2/reply/reply?oid={oid}&type={source_type}&root={root_rpid}&pn={page_number}&ps=20"
         try:
-            response = requests.get(url, headers=header, timeout=5)
+            response = api_get(url, header)
             response.raise_for_status()
             data = response.json()
             if data.get('code') == 0 and data.get('data'):
@@ -124,12 +243,13 @@ def fetch_all_sub_replies(oid, root_rpid, header):
                 if not replies: break
                 all_replies.extend(replies)
                 page_number += 1
-                time.sleep(1)
             else:
-                print(f"  - [警告] 获取子评论时响应异常: {data.get('message', '未知错误')}")
+                events.emit('error', level='warning', stage='fetch_replies', type=source_type, oid=oid,
+                            root=root_rpid, code=data.get('code'), error=data.get('message', '未知错误'))
                 break
         except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-            print(f"  - [错误] 请求子评论 API (root={root_rpid}) 时失败: {e}")
+            events.emit('error', level='error', stage='fetch_replies', type=source_type, oid=oid,
+                        root=root_rpid, error_type=type(e).__name__, error=str(e))
             break
     return all_replies
 
@@ -137,30 +257,31 @@ def fetch_all_sub_replies(oid, root_rpid, header):
 # --- 启动菜单与主逻辑 ---
 
 def display_main_menu():
-    """显示主菜单并处理用户交互，返回用户选择要监控的视频列表。"""
+    """显示主菜单并处理用户交互，返回用户选择要监控的目标列表。"""
     header = get_header()
-    selected_videos = {}
+    selected_targets = {}
 
     while True:
         print("\n" + "=" * 20 + " B站评论监控菜单 " + "=" * 20)
-        saved_videos = db.get_monitored_videos()
-        if not saved_videos:
-            print("数据库中没有已保存的视频。请先添加。")
+        saved_targets = db.get_monitored_targets()
+        if not saved_targets:
+            print("数据库中没有已保存的监控目标。请先添加。")
         else:
-            print("已保存的视频列表:")
-            for i, (oid, bv_id, title) in enumerate(saved_videos):
-                print(f"  [{i + 1}] {title} ({bv_id})")
+            print("已保存的监控目标列表:")
+            for i, (source_type, oid, source_id, title) in enumerate(saved_targets):
+                type_name = SOURCE_TYPES.get(source_type, f"type={source_type}")
+                print(f"  [{i + 1}] [{type_name}] {title} ({source_id})")
 
         print("\n操作选项:")
-        print("  - 输入数字 (如 1,3) 选择列表中的视频加入本次监控。")
-        print("  - 输入 'a' 添加新的视频 BV 号到数据库。")
-        print("  - 输入 'r' 移除数据库中的视频。")
-        print("  - 输入 's' 开始监控已选择的视频。")
+        print("  - 输入数字 (如 1,3) 选择列表中的目标加入本次监控。")
+        print("  - 输入 'a' 添加新的监控目标 (视频、动态、专栏、音频) 到数据库。")
+        print("  - 输入 'r' 移除数据库中的监控目标。")
+        print("  - 输入 's' 开始监控已选择的目标。")
         print("  - 输入 'q' 退出程序。")
 
-        if selected_videos:
+        if selected_targets:
             print("\n当前已选择:")
-            for data in selected_videos.values():
+            for data in selected_targets.values():
                 print(f"  -> 【{data['title']}】")
 
         choice = input("\n请输入您的选择: ").strip().lower()
@@ -169,9 +290,9 @@ def display_main_menu():
             try:
                 indices = [int(i.strip()) - 1 for i in choice.split(',')]
                 for i in indices:
-                    if 0 <= i < len(saved_videos):
-                        oid, bv_id, title = saved_videos[i]
-                        selected_videos[oid] = {"title": title, "bv_id": bv_id}
+                    if 0 <= i < len(saved_targets):
+                        source_type, oid, source_id, title = saved_targets[i]
+                        selected_targets[(source_type, oid)] = {"title": title, "source_id": source_id}
                         print(f"已选择: 【{title}】")
                     else:
                         print(f"错误：数字 {i + 1} 无效。")
@@ -179,28 +300,28 @@ def display_main_menu():
                 print("错误：请输入正确的数字格式。")
 
         elif choice == 'a':
-            bv_input = input("请输入要添加的新 BV 号 (多个请用逗号或空格隔开): ").strip()
-            bvs = [bv.strip() for bv in re.split(r'[\s,]+', bv_input) if bv.strip()]
-            for bv in bvs:
-                oid, title = get_information(bv, header)
-                if oid and title:
-                    if db.add_video_to_db(oid, bv, title):
+            print("支持的格式: BV 号、动态链接或 dyn<动态ID>、cv<专栏ID>、au<音频ID>，或直接输入 type:oid。")
+            source_input = input("请输入要添加的新目标 (多个请用逗号或空格隔开): ").strip()
+            entries = [entry.strip() for entry in re.split(r'[\s,]+', source_input) if entry.strip()]
+            for entry in entries:
+                source = resolve_source(entry, header)
+                if source:
+                    source_type, oid, source_id, title = source
+                    if db.add_target_to_db(source_type, oid, source_id, title):
                         print(f"成功将【{title}】添加到数据库。")
-                time.sleep(1)
 
         elif choice == 'r':
-            if not saved_videos: continue
-            remove_choice = input("请输入要移除的视频编号: ").strip()
+            if not saved_targets: continue
+            remove_choice = input("请输入要移除的目标编号: ").strip()
             try:
                 idx = int(remove_choice) - 1
-                if 0 <= idx < len(saved_videos):
-                    oid_to_remove, _, title_to_remove = saved_videos[idx]
+                if 0 <= idx < len(saved_targets):
+                    type_to_remove, oid_to_remove, _, title_to_remove = saved_targets[idx]
                     confirm = input(f"确定要从数据库移除【{title_to_remove}】吗? (y/n): ").lower()
                     if confirm == 'y':
-                        if db.remove_video_from_db(oid_to_remove):
+                        if db.remove_target_from_db(type_to_remove, oid_to_remove):
                             print(f"已成功移除【{title_to_remove}】。")
-                            if oid_to_remove in selected_videos:
-                                del selected_videos[oid_to_remove]
+                            selected_targets.pop((type_to_remove, oid_to_remove), None)
                         else:
                             print("移除失败。")
                 else:
@@ -209,10 +330,10 @@ def display_main_menu():
                 print("错误：请输入一个数字。")
 
         elif choice == 's':
-            if not selected_videos:
-                print("错误：您还没有选择任何要监控的视频。")
+            if not selected_targets:
+                print("错误：您还没有选择任何要监控的目标。")
             else:
-                return list(selected_videos.items())
+                return list(selected_targets.items())
 
         elif choice == 'q':
             print("程序退出。")
@@ -222,13 +343,10 @@ def display_main_menu():
             print("无效的输入，请重新选择。")
 
 
-def process_and_notify_comment(reply, oid, seen_ids, parent_user_name=None):
-    """处理单条评论，检查是否为新评论，如果是，则存入数据库并返回格式化信息。"""
+def process_and_notify_comment(reply, seen_ids, parent_user_name=None):
+    """处理单条评论，检查是否为新评论，如果是，则标记为已见并返回格式化信息（由调用方批量存入数据库）。"""
     rpid = reply['rpid_str']
     if rpid not in seen_ids:
-        seen_ids.add(rpid)
-        db.add_comment_to_db(rpid, oid)
-
         # 判断回复类型
         if parent_user_name:
             # B站API中，对子评论的回复会包含 at_details
@@ -244,12 +362,17 @@ def process_and_notify_comment(reply, oid, seen_ids, parent_user_name=None):
             # 主评论
             comment_type = "主评论"
 
-        return {
+        new_comment = {
+            "rpid": rpid,
+            "kind": "reply" if parent_user_name else "main",
             "user": reply['member']['uname'],
             "message": reply['content']['message'],
             "time": pd.to_datetime(reply["ctime"], unit='s', utc=True).tz_convert('Asia/Shanghai'),
             "type": comment_type
         }
+        # 解析成功后才标记为已见，解析失败的评论会在下一轮重新检查
+        seen_ids.add(rpid)
+        return new_comment
     return None
 
 
@@ -258,12 +381,7 @@ def wait_with_manual_trigger(interval_seconds):
     等待指定的秒数，同时监听用户的 Enter 键以立即触发。
     此版本兼容 Windows 和类 Unix 系统。
     """
-    minutes = interval_seconds // 60
-    seconds = interval_seconds % 60
-    wait_message = f"等待 {minutes} 分钟 {seconds} 秒后" if minutes > 0 else f"等待 {seconds} 秒后"
-
-    print(f"\n所有视频检查完毕。{wait_message}进行下一轮检查...")
-    print("您可以随时按下 [Enter] 键来立即开始下一轮检查。")
+    events.emit('wait', interval=interval_seconds)
 
     start_time = time.time()
     while time.time() - start_time < interval_seconds:
@@ -273,104 +391,134 @@ def wait_with_manual_trigger(interval_seconds):
             if msvcrt.kbhit():
                 # msvcrt.getch() 会读取按键，我们检查它是否是 Enter (回车符)
                 if msvcrt.getch() in [b'\r', b'\n']:
-                    print("\n收到手动触发指令，立即开始新一轮检查！")
+                    events.emit('manual_trigger')
                     return  # 立即退出等待
         else:  # Linux, macOS, etc.
             # 使用 select，它在这里工作得很好
             readable, _, _ = select.select([sys.stdin], [], [], 0.1)  # 短暂等待0.1秒
             if readable:
                 sys.stdin.readline()  # 清空输入缓冲区
-                print("\n收到手动触发指令，立即开始新一轮检查！")
+                events.emit('manual_trigger')
                 return  # 立即退出等待
 
         time.sleep(0.1)  # 短暂休眠，避免 CPU 占用过高
 
 
+def emit_new_comments(title, source_type, oid, sorted_comments):
+    """为一批新评论记录事件，控制台视图由事件渲染得到。"""
+    events.emit('new_comments', title=title, type=source_type, oid=oid, count=len(sorted_comments))
+    for new_comment in sorted_comments:
+        events.emit('new_comment', title=title, type=source_type, oid=oid, rpid=new_comment['rpid'],
+                    kind=new_comment['kind'], comment_type=new_comment['type'],
+                    user=new_comment['user'], message=new_comment['message'],
+                    time=new_comment['time'].isoformat())
+
+
+def check_target(source_type, oid, seen_ids, header):
+    """检查单个目标的新评论（包含所有子评论），写入数据库后按时间排序返回。"""
+    new_comments_found = []
+    try:
+        latest_comments = fetch_latest_comments(source_type, oid, header)
+        events.emit('fetch_result', level='debug', stage='main', type=source_type, oid=oid,
+                    count=len(latest_comments))
+
+        for comment in latest_comments:
+            new_main_comment = process_and_notify_comment(comment, seen_ids)
+            if new_main_comment:
+                new_comments_found.append(new_main_comment)
+
+            if comment.get('replies'):
+                for sub_reply in comment['replies']:
+                    new_sub_comment = process_and_notify_comment(sub_reply, seen_ids,
+                                                                 parent_user_name=comment['member']['uname'])
+                    if new_sub_comment:
+                        new_comments_found.append(new_sub_comment)
+
+            rcount = comment.get('rcount', 0)
+            initial_reply_count = len(comment.get('replies') or [])
+
+            if rcount > initial_reply_count:
+                events.emit('fetch_replies', type=source_type, oid=oid, root=comment['rpid_str'],
+                            user=comment['member']['uname'], rcount=rcount)
+                all_sub_replies = fetch_all_sub_replies(source_type, oid, comment['rpid_str'], header)
+                events.emit('fetch_result', level='debug', stage='replies', type=source_type, oid=oid,
+                            root=comment['rpid_str'], count=len(all_sub_replies))
+
+                for sub_reply in all_sub_replies:
+                    new_hidden_comment = process_and_notify_comment(sub_reply, seen_ids,
+                                                                    parent_user_name=comment['member']['uname'])
+                    if new_hidden_comment:
+                        new_comments_found.append(new_hidden_comment)
+
+        # 一次性将本目标的新评论写入数据库
+        db.add_comments_to_db([c['rpid'] for c in new_comments_found], source_type, oid)
+    except Exception:
+        # 未能完整处理的新评论从已见集合中移除，下一轮重新检查
+        seen_ids.difference_update(c['rpid'] for c in new_comments_found)
+        raise
+
+    # 对新评论按时间排序
+    return sorted(new_comments_found, key=lambda x: x['time'])
+
+
 # vvv 修改 vvv
 def start_monitoring(targets_to_monitor, header, interval, webhook_enabled):
-    """监控选定视频的新评论，包含获取所有子评论的功能。"""
-    video_targets = {}
+    """监控选定目标（视频、动态、专栏等）的新评论，包含获取所有子评论的功能。"""
+    monitored_targets = {}
 
-    print("\n" + "=" * 20 + " 初始化监控数据 " + "=" * 20)
-    for oid, data in targets_to_monitor:
-        print(f"正在为【{data['title']}】加载历史评论记录...")
-        video_targets[oid] = {
+    events.emit('monitor_start', targets=len(targets_to_monitor))
+    for (source_type, oid), data in targets_to_monitor:
+        monitored_targets[(source_type, oid)] = {
             "title": data['title'],
-            "seen_ids": db.load_seen_comments_for_video(oid)
+            "source_id": data['source_id'],
+            "seen_ids": db.load_seen_comments_for_target(source_type, oid)
         }
-        print(f"-> 加载完成，已记录 {len(video_targets[oid]['seen_ids'])} 则历史评论。")
+        events.emit('target_loaded', title=data['title'], type=source_type, oid=oid,
+                    seen=len(monitored_targets[(source_type, oid)]['seen_ids']))
 
-    print(f"\n✅ 准备就绪！开始监控 {len(video_targets)} 个视频。")
-    print("=" * 55)
+    events.emit('monitor_ready', targets=len(monitored_targets))
 
     while True:
         try:
-            now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            print(f"\n[{now}] 开始新一轮检查...")
+            cycle_started = time.time()
+            cycle_new_comments = 0
+            events.emit('cycle_start', targets=len(monitored_targets))
 
-            for oid, data in video_targets.items():
+            for (source_type, oid), data in monitored_targets.items():
                 title = data['title']
-                seen_ids = data['seen_ids']
-                print(f"  -> 正在检查【{title}】...")
-
-                latest_comments = fetch_latest_comments(oid, header)
-                new_comments_found = []
-
-                for comment in latest_comments:
-                    new_main_comment = process_and_notify_comment(comment, oid, seen_ids)
-                    if new_main_comment:
-                        new_comments_found.append(new_main_comment)
-
-                    if comment.get('replies'):
-                        for sub_reply in comment['replies']:
-                            new_sub_comment = process_and_notify_comment(sub_reply, oid, seen_ids,
-                                                                         parent_user_name=comment['member']['uname'])
-                            if new_sub_comment:
-                                new_comments_found.append(new_sub_comment)
-
-                    rcount = comment.get('rcount', 0)
-                    initial_reply_count = len(comment.get('replies') or [])
-
-                    if rcount > initial_reply_count:
-                        print(f"  └── 发现【{comment['member']['uname']}】的评论有 {rcount} 条回复，正在抓取所有回复...")
-                        all_sub_replies = fetch_all_sub_replies(oid, comment['rpid_str'], header)
-
-                        for sub_reply in all_sub_replies:
-                            new_hidden_comment = process_and_notify_comment(sub_reply, oid, seen_ids,
-                                                                            parent_user_name=comment['member']['uname'])
-                            if new_hidden_comment:
-                                new_comments_found.append(new_hidden_comment)
-
-                if new_comments_found:
-                    # 对新评论按时间排序
-                    sorted_comments = sorted(new_comments_found, key=lambda x: x['time'])
-
-                    # 控制台打印
-                    print("*" * 25)
-                    print(f"🔥【{title}】发现 {len(sorted_comments)} 则新评论！")
-                    print("*" * 25)
-                    for new_comment in sorted_comments:
-                        print(f"  类型: {new_comment['type']}")
-                        print(f"  用户: {new_comment['user']}")
-                        print(f"  评论: {new_comment['message']}")
-                        print(f"  时间: {new_comment['time'].strftime('%Y-%m-%d %H:%M:%S')}")
-                        print("-" * 25)
-
-                    # 如果启用了 Webhook，则发送通知
-                    if webhook_enabled:
-                        notifier.send_webhook_notification(title, sorted_comments)
-
-                time.sleep(3)  # 检查完一个视频后短暂休息，防止请求过快
-
+                events.emit('target_check', title=title, type=source_type, oid=oid)
+
+                # 单个目标出错只记录错误并跳过，不影响本轮其余目标
+                try:
+                    sorted_comments = check_target(source_type, oid, data['seen_ids'], header)
+                    if sorted_comments:
+                        cycle_new_comments += len(sorted_comments)
+                        emit_new_comments(title, source_type, oid, sorted_comments)
+
+                        # 如果启用了 Webhook，则发送通知
+                        if webhook_enabled:
+                            notifier.send_webhook_notification(title, sorted_comments,
+                                                               target_keys=(f"{source_type}:{oid}", data['source_id']))
+                except Exception as e:
+                    events.emit('error', level='error', stage='check_target', title=title, type=source_type, oid=oid,
+                                error_type=type(e).__name__, error=str(e))
+
+                time.sleep(TARGET_INTERVAL)  # 检查完一个目标后短暂休息，防止请求过快
+
+            events.emit('cycle_end', targets=len(monitored_targets), new_comments=cycle_new_comments,
+                        duration=round(time.time() - cycle_started, 1))
             wait_with_manual_trigger(interval)
 
         except KeyboardInterrupt:
-            print("\n程序被用户手动中断 (Ctrl+C)。再见！")
+            events.emit('shutdown', reason='keyboard_interrupt')
+            notifier.shutdown(wait=True)
+            events.emit('shutdown_complete')
+            events.close()
             break
         except Exception as e:
             # 增加错误类型的打印，方便调试
-            print(f"\n[严重错误] 监控循环中发生未知错误 ({type(e).__name__}): {e}")
-            print("等待 60 秒后重试...")
+            events.emit('error', level='error', stage='monitor_loop', error_type=type(e).__name__,
+                        error=str(e), retry_in=60)
             time.sleep(60)
 
 
@@ -406,7 +554,9 @@ if __name__ == "__main__":
         # vvv 新增：Webhook 开关逻辑 vvv
         webhook_enabled = False
         # 检查配置文件是否存在且有效
-        if notifier.check_webhook_configured():
+        webhook_configured = notifier.check_webhook_configured()
+        events.flush()  # 确保读取配置时产生的提示在下方提问之前输出
+        if webhook_configured:
             while True:
                 enable_choice = input("\n检测到 Webhook 配置文件，是否启用通知功能? (y/n): ").strip().lower()
                 if enable_choice == 'y':
@@ -421,7 +571,7 @@ if __name__ == "__main__":
                     print("输入无效，请输入 'y' 或 'n'。")
         else:
             print("\n提示：未找到有效的 'webhook_config.txt' 文件，Webhook 通知功能将保持禁用。")
-            print("如需启用，请创建该文件并在其中填入您的 Webhook URL。")
+            print("如需启用，请创建该文件并在其中填入您的 Webhook URL（每行一个，可按视频和评论类型分流）。")
         # ^^^ 新增 ^^^
 
         header = get_header()
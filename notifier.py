@@ -1,69 +1,307 @@
 # filename: notifier.py
-import requests
 import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import events
 
 # 定义配置文件的名称
 WEBHOOK_CONFIG_FILE = 'webhook_config.txt'
 
 
-def check_webhook_configured():
-    """检查 Webhook 配置文件是否存在且不为空。"""
+def _strip_markdown(text):
+    """去掉可能破坏 Markdown 格式的字符。"""
+    return text.replace('`', '').replace('*', '')
+
+
+def _escape_slack(text):
+    """Slack mrkdwn 需要转义 &、<、>，并去掉会破坏格式的字符。"""
+    return _strip_markdown(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+# 各平台的消息格式：
+#   payload - 构造 JSON 请求体
+#   bold    - 加粗文本的写法（纯文本消息类型不支持加粗，原样输出）
+#   escape  - 清理用户输入的评论内容
+#   limit   - 单条消息允许的最大字符数（None 表示不拆分）
+PLATFORMS = {
+    'discord': {
+        "payload": lambda text: {"content": text},
+        "bold": lambda text: f"**{text}**",
+        "escape": _strip_markdown,
+        "limit": 2000,
+    },
+    'slack': {
+        "payload": lambda text: {"text": text},
+        "bold": lambda text: f"*{text}*",
+        "escape": _escape_slack,
+        "limit": 4000,
+    },
+    'feishu': {
+        "payload": lambda text: {"msg_type": "text", "content": {"text": text}},
+        "bold": lambda text: text,
+        "escape": lambda text: text,
+        "limit": 10000,
+    },
+    'dingtalk': {
+        "payload": lambda text: {"msgtype": "text", "text": {"content": text}},
+        "bold": lambda text: text,
+        "escape": lambda text: text,
+        "limit": 6000,
+    },
+    'generic': {
+        "payload": lambda text: {"content": text},
+        "bold": lambda text: f"**{text}**",
+        "escape": _strip_markdown,
+        "limit": None,
+    },
+}
+
+# 未显式指定 platform 时，根据 Webhook 域名自动识别平台
+PLATFORM_HOSTS = {
+    'discord.com': 'discord',
+    'discordapp.com': 'discord',
+    'hooks.slack.com': 'slack',
+    'open.feishu.cn': 'feishu',
+    'open.larksuite.com': 'feishu',
+    'oapi.dingtalk.com': 'dingtalk',
+}
+
+SEPARATOR = "--------------------------------------"
+
+# limit 的最小值：保证一条消息至少能容纳标题和一条评论的基本信息
+MIN_LIMIT = 500
+
+# 已解析的路由表及对应配置文件的修改时间，文件变化时才重新解析
+_routes_cache = {"mtime": None, "routes": []}
+
+# 每个 Webhook URL 对应一个独立的连接池和单线程发送队列：
+# 同一目标的消息按顺序发送，而一个慢速目标不会拖慢其他目标或监控循环。
+_destinations = {}
+_destinations_lock = threading.Lock()
+
+
+def _parse_route_line(line, line_number):
+    """
+    解析配置文件中的一行路由规则，格式为：
+    URL [platform=discord] [targets=BV1xx,dyn123,12:456] [types=main|reply|all] [limit=2000] [name=备注]
+    只写 URL 时，该目标接收所有监控目标的所有评论。
+    未指定 name 时以 "域名#行号" 命名，便于区分同一平台的多个目标。
+    """
+    parts = line.split()
+    url = parts[0]
+    options = {}
+    for part in parts[1:]:
+        key, sep, value = part.partition('=')
+        if not sep:
+            raise ValueError(f"无法识别的选项 '{part}'")
+        options[key.strip().lower()] = value.strip()
+
+    platform = options.get('platform') or PLATFORM_HOSTS.get(urlparse(url).hostname or '', 'generic')
+    if platform not in PLATFORMS:
+        raise ValueError(f"不支持的平台 '{platform}'")
+
+    types = options.get('types', 'all').lower()
+    if types not in ('main', 'reply', 'all'):
+        raise ValueError(f"types 只能是 main、reply 或 all，而不是 '{types}'")
+
+    limit = PLATFORMS[platform]['limit']
+    if options.get('limit'):
+        limit = int(options['limit'])
+        if limit < MIN_LIMIT:
+            raise ValueError(f"limit 不能小于 {MIN_LIMIT}，而不是 '{options['limit']}'")
+
+    targets = {t.strip() for t in options.get('targets', '').split(',') if t.strip()}
+
+    return {
+        "url": url,
+        "name": options.get('name') or f"{urlparse(url).hostname or 'webhook'}#{line_number}",
+        "platform": platform,
+        "targets": targets,
+        "types": types,
+        "limit": limit,
+    }
+
+
+def load_routes():
+    """从配置文件读取所有 Webhook 路由，忽略空行和以 # 开头的注释行。"""
     if not os.path.exists(WEBHOOK_CONFIG_FILE):
-        return False
+        return []
+    routes = []
     try:
         with open(WEBHOOK_CONFIG_FILE, 'r', encoding='utf-8') as f:
-            # 确保读取到的URL不只是空白字符
-            return f.read().strip() != ""
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                try:
+                    routes.append(_parse_route_line(line, line_number))
+                except ValueError as e:
+                    events.emit('error', level='warning', stage='webhook_config', file=WEBHOOK_CONFIG_FILE,
+                                line=line_number, error=str(e))
     except Exception:
+        return []
+    return routes
+
+
+def get_routes():
+    """返回缓存的路由表；仅当配置文件的修改时间变化时才重新解析。"""
+    try:
+        mtime = os.path.getmtime(WEBHOOK_CONFIG_FILE)
+    except OSError:
+        _routes_cache.update(mtime=None, routes=[])
+        return []
+    if mtime != _routes_cache['mtime']:
+        _routes_cache.update(mtime=mtime, routes=load_routes())
+    return _routes_cache['routes']
+
+
+def check_webhook_configured():
+    """检查 Webhook 配置文件是否存在且至少包含一条有效路由。"""
+    return bool(get_routes())
+
+
+def _route_matches(route, target_keys, comment):
+    """判断一条评论是否应发送到该路由。"""
+    if route['targets'] and not (route['targets'] & target_keys):
         return False
+    return route['types'] == 'all' or comment.get('kind', 'main') == route['types']
+
+
+def _truncate(text, length):
+    """把已转义的文本截断到 length 个字符以内（末尾加 "…"），并去掉被截断的 HTML 实体。"""
+    if len(text) <= length:
+        return text
+    return re.sub(r'&[a-z]*$', '', text[:max(length - 1, 0)]) + "…"
+
+
+def _format_header(video_title, count, platform, max_length=None):
+    """按目标平台的格式生成消息标题，过长时截断视频标题。"""
+    bold = PLATFORMS[platform]['bold']
+    title = PLATFORMS[platform]['escape'](video_title)
+    header = f"🔥 {bold(f'【{title}】发现 {count} 条新评论！')}\n{SEPARATOR}"
+    if max_length and len(header) > max_length:
+        title = _truncate(title, len(title) - (len(header) - max_length))
+        header = f"🔥 {bold(f'【{title}】发现 {count} 条新评论！')}\n{SEPARATOR}"
+    return header
+
+
+def _format_comment(comment, platform, max_length=None):
+    """按目标平台的格式将单条评论格式化为消息块；过长时只截断评论内容，保留格式标记完整。"""
+    bold = PLATFORMS[platform]['bold']
+    escape = PLATFORMS[platform]['escape']
+    message = escape(comment['message'])
+
+    def build(body):
+        return (
+            f"{bold('用户:')} {escape(comment['user'])}\n"
+            f"{bold('类型:')} {escape(comment['type'])}\n"
+            f"{bold('内容:')} {body}\n"
+            f"{bold('时间:')} {comment['time'].strftime('%Y-%m-%d %H:%M:%S')}\n"
+            f"{SEPARATOR}"
+        )
 
+    block = build(message)
+    if max_length and len(block) > max_length:
+        block = build(_truncate(message, len(message) - (len(block) - max_length)))
+    return block
 
-def send_webhook_notification(video_title, new_comments):
+
+def _split_message(header, blocks, limit):
     """
-    格式化新评论信息并将其发送到配置的 Webhook URL。
-    支持简单的文本格式，兼容 Discord, Slack, 飞书, 钉钉等多种平台。
+    将标题和评论块拼接成一条或多条消息，每条不超过 limit 个字符。
+    拆分只发生在评论块之间；调用方需保证标题加单个评论块不超过 limit。
     """
-    # 再次检查配置，这是一个安全措施
-    if not check_webhook_configured():
-        return
-
-    with open(WEBHOOK_CONFIG_FILE, 'r', encoding='utf-8') as f:
-        webhook_url = f.read().strip()
-
-    # 格式化通知内容
-    # 这种格式在大多数平台上都表现良好
-    message_lines = [
-        f"🔥 **【{video_title}】发现 {len(new_comments)} 条新评论！**",
-        "--------------------------------------"
-    ]
-    for comment in new_comments:
-        # 清理可能破坏JSON或Markdown的字符
-        user = comment['user'].replace('`', '').replace('*', '')
-        message = comment['message'].replace('`', '').replace('*', '')
-
-        comment_block = (
-            f"**用户:** {user}\n"
-            f"**类型:** {comment['type']}\n"
-            f"**内容:** {message}\n"
-            f"**时间:** {comment['time'].strftime('%Y-%m-%d %H:%M:%S')}"
-        )
-        message_lines.append(comment_block)
-        message_lines.append("--------------------------------------")
+    if not limit:
+        return ["\n".join([header] + blocks)]
 
-    full_message = "\n".join(message_lines)
+    messages = []
+    current = header
+    for block in blocks:
+        candidate = f"{current}\n{block}"
+        if len(candidate) > limit:
+            messages.append(current)
+            current = f"{header}\n{block}"
+        else:
+            current = candidate
+    messages.append(current)
+    return messages
 
-    # 构建通用的 JSON payload
-    # 大多数平台接受一个包含 "content" 键的 JSON
-    payload = {
-        "content": full_message
-    }
 
-    # 发送POST请求
-    try:
-        response = requests.post(webhook_url, json=payload, timeout=10)
-        # 检查响应状态码，如果是不成功的状态码（如4xx, 5xx），则会抛出异常
-        response.raise_for_status()
-        print(f"  - [通知] Webhook 通知已成功发送。")
-    except requests.exceptions.RequestException as e:
-        print(f"  - [错误] 发送 Webhook 通知失败: {e}")
+def _get_destination(url):
+    """获取（或创建）某个 URL 专用的 Session 和发送线程。"""
+    with _destinations_lock:
+        destination = _destinations.get(url)
+        if destination is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            destination = {
+                "session": session,
+                "executor": ThreadPoolExecutor(max_workers=1, thread_name_prefix='webhook'),
+            }
+            _destinations[url] = destination
+        return destination
+
+
+def _deliver(session, route, payloads):
+    """在后台线程中依次发送一个目标的所有消息。"""
+    for payload in payloads:
+        try:
+            response = session.post(route['url'], json=payload, timeout=10)
+            # 检查响应状态码，如果是不成功的状态码（如4xx, 5xx），则会抛出异常
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            events.emit('notify_result', level='error', destination=route['name'], ok=False,
+                        messages=len(payloads), error=str(e))
+            return
+    events.emit('notify_result', destination=route['name'], ok=True, messages=len(payloads))
+
+
+def send_webhook_notification(video_title, new_comments, target_keys=()):
+    """
+    按路由表将新评论分发到所有匹配的 Webhook 目标。
+    target_keys 为当前目标的标识（如 BV 号、dyn 动态ID 以及 type:oid），用于匹配路由中的 targets。
+    发送在后台进行，函数立即返回已排队的目标数量。
+    """
+    routes = get_routes()
+    if not routes:
+        return 0
+
+    target_keys = {str(key) for key in target_keys if key}
+    queued = 0
+    for route in routes:
+        comments = [c for c in new_comments if _route_matches(route, target_keys, c)]
+        if not comments:
+            continue
+
+        limit = route['limit']
+        # 标题最多占用一半空间，剩余空间至少能放下一条（必要时截断内容的）评论
+        header = _format_header(video_title, len(comments), route['platform'], limit and limit // 2)
+        room = limit and limit - len(header) - 1
+        blocks = [_format_comment(c, route['platform'], room) for c in comments]
+        build_payload = PLATFORMS[route['platform']]['payload']
+        payloads = [build_payload(text) for text in _split_message(header, blocks, limit)]
+
+        destination = _get_destination(route['url'])
+        destination['executor'].submit(_deliver, destination['session'], route, payloads)
+        events.emit('notify_queued', level='debug', destination=route['name'], comments=len(comments),
+                    messages=len(payloads))
+        queued += 1
+    return queued
+
 
+def shutdown(wait=True):
+    """关闭所有发送线程；wait 为 True 时等待队列中的通知发送完毕。"""
+    with _destinations_lock:
+        destinations = list(_destinations.values())
+        _destinations.clear()
+    for destination in destinations:
+        destination['executor'].shutdown(wait=wait)
+        destination['session'].close()